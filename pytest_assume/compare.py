@@ -0,0 +1,230 @@
+"""
+Comparison helpers behind the ``pytest.assume_*`` functions.
+
+Each helper does the (possibly expensive) comparison and returns ``None`` when
+things match, or a message describing the mismatch.
+"""
+import contextlib
+import mmap
+import os
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DEFAULT_REL = 1e-6
+DEFAULT_ABS = 1e-12
+
+
+def _tolerances(rel_tol, abs_tol):
+    # Same rules as pytest.approx: an explicit `abs` alone disables the default relative tolerance.
+    if rel_tol is None:
+        rel_tol = 0.0 if abs_tol is not None else DEFAULT_REL
+    if abs_tol is None:
+        abs_tol = DEFAULT_ABS
+    return float(rel_tol), float(abs_tol)
+
+
+def _format_index(index):
+    return "[%s]" % ", ".join(str(i) for i in index)
+
+
+def _summary(total, count, max_abs, max_rel, firsts, rel_tol, abs_tol):
+    shown = ", ".join("%s %r != %r" % (_format_index(i), a, e) for i, a, e in firsts)
+    return (
+        "%s of %s values differ (rel=%g, abs=%g): max abs error %g, max rel error %g; "
+        "first mismatches: %s" % (count, total, rel_tol, abs_tol, max_abs, max_rel, shown)
+    )
+
+
+def _nanmax(values):
+    values = values[~numpy.isnan(values)]
+    return float(values.max()) if values.size else 0.0
+
+
+def _close_numpy(actual, expected, rel_tol, abs_tol, max_report):
+    a = numpy.asarray(actual, dtype=float)
+    e = numpy.asarray(expected, dtype=float)
+    if e.ndim == 0:
+        # Scalar expectation, compared against every value.
+        e = numpy.broadcast_to(e, a.shape)
+    elif a.shape != e.shape:
+        # Like pytest.approx, no other broadcasting.
+        return "shape mismatch: %s != %s" % (a.shape, e.shape)
+
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        diff = numpy.abs(a - e)
+        bad = ~((diff <= numpy.maximum(rel_tol * numpy.abs(e), abs_tol)) | (a == e))
+        count = int(numpy.count_nonzero(bad))
+        if not count:
+            return None
+
+        bad_diff = diff[bad]
+        max_abs = _nanmax(bad_diff)
+        max_rel = _nanmax(bad_diff / numpy.abs(e[bad]))
+
+    flat = numpy.flatnonzero(bad)[:max_report]
+    indices = zip(*numpy.unravel_index(flat, bad.shape)) if bad.ndim else [()] * len(flat)
+    firsts = [
+        (tuple(int(i) for i in index), a.flat[f].item(), e.flat[f].item()) for index, f in zip(indices, flat)
+    ]
+    return _summary(bad.size, count, max_abs, max_rel, firsts, rel_tol, abs_tol)
+
+
+def _flatten(value, index=()):
+    if isinstance(value, (str, bytes)):
+        yield index, value
+        return
+    try:
+        items = iter(value)
+    except TypeError:
+        yield index, value
+        return
+    for i, item in enumerate(items):
+        for x in _flatten(item, index + (i,)):
+            yield x
+
+
+def _close_python(actual, expected, rel_tol, abs_tol, max_report):
+    actual = list(_flatten(actual))
+    expected = list(_flatten(expected))
+    if len(expected) == 1 and expected[0][0] == ():
+        # Scalar expectation, compared against every value.
+        expected = [(index, expected[0][1]) for index, _ in actual]
+    if [i for i, _ in actual] != [i for i, _ in expected]:
+        return "shape mismatch: %s values != %s values" % (len(actual), len(expected))
+
+    count = 0
+    max_abs = max_rel = 0.0
+    firsts = []
+    for (index, a), (_, e) in zip(actual, expected):
+        if a == e:
+            continue
+        try:
+            diff = abs(a - e)
+            rel_err = diff / abs(e) if e else float("inf")
+            ok = diff <= max(rel_tol * abs(e), abs_tol)
+        except (TypeError, OverflowError):
+            diff = rel_err = float("nan")
+            ok = False
+        if ok:
+            continue
+
+        count += 1
+        # NaN differences never win (comparisons with NaN are false).
+        if diff > max_abs:
+            max_abs = diff
+        if rel_err > max_rel:
+            max_rel = rel_err
+        if len(firsts) < max_report:
+            firsts.append((index, a, e))
+
+    if not count:
+        return None
+    return _summary(len(actual), count, max_abs, max_rel, firsts, rel_tol, abs_tol)
+
+
+def compare_close(actual, expected, rel=None, abs=None, max_report=10):
+    """
+    Compare two numbers, sequences or arrays element-wise, with the tolerances of ``pytest.approx``.
+
+    Uses a single vectorized pass when NumPy is available, and a plain loop otherwise.
+
+    :return: None if every value is close enough, or a message with the number of mismatches,
+        the largest absolute and relative errors, and the first `max_report` offending indices.
+    """
+    rel_tol, abs_tol = _tolerances(rel, abs)
+    if numpy is not None:
+        try:
+            return _close_numpy(actual, expected, rel_tol, abs_tol, max_report)
+        except (TypeError, ValueError):
+            # Not numeric (or ragged): fall back on the generic comparison.
+            pass
+    return _close_python(actual, expected, rel_tol, abs_tol, max_report)
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+@contextlib.contextmanager
+def _mapped(data_or_path):
+    """Yield a sliceable, read-only view of bytes, or of a file (memory-mapped)."""
+    if isinstance(data_or_path, (bytes, bytearray, memoryview)):
+        yield data_or_path
+        return
+
+    with open(str(data_or_path), "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be mapped.
+            yield b""
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def _first_difference(a, b):
+    """Offset of the first differing byte of two equal-length, different buffers."""
+    lo, hi = 0, len(a)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _line_and_column(data, offset, chunk_size):
+    line = 1
+    last_newline = -1
+    for start in range(0, offset, chunk_size):
+        chunk = bytes(data[start : min(start + chunk_size, offset)])
+        newlines = chunk.count(b"\n")
+        if newlines:
+            line += newlines
+            last_newline = start + chunk.rfind(b"\n")
+    return line, offset - last_newline
+
+
+def compare_file(actual, golden, chunk_size=DEFAULT_CHUNK_SIZE, context=20):
+    """
+    Compare bytes, or a file, against a golden file.
+
+    Both files are memory-mapped and compared chunk by chunk, stopping at the first
+    difference, so neither is read into memory as a whole.
+
+    :return: None if the contents are identical, or a message with the byte offset
+        (and line/column) of the first divergence.
+    """
+    with _mapped(actual) as a, _mapped(golden) as g:
+        size_a, size_g = len(a), len(g)
+        common = min(size_a, size_g)
+        offset = None
+        for start in range(0, common, chunk_size):
+            end = min(start + chunk_size, common)
+            chunk_a, chunk_g = a[start:end], g[start:end]
+            if chunk_a != chunk_g:
+                offset = start + _first_difference(chunk_a, chunk_g)
+                break
+
+        if offset is None:
+            if size_a == size_g:
+                return None
+            offset = common
+
+        line, column = _line_and_column(g, offset, chunk_size)
+        msg = "content differs from golden file %s at byte %s (line %s, column %s): %r != %r" % (
+            golden,
+            offset,
+            line,
+            column,
+            bytes(a[max(offset - context, 0) : offset + context]),
+            bytes(g[max(offset - context, 0) : offset + context]),
+        )
+        if size_a != size_g:
+            msg += "; sizes differ: %s != %s bytes" % (size_a, size_g)
+        return msg
@@ -0,0 +1,58 @@
+"""
+Polling state behind ``pytest.assume_eventually`` and its async variant.
+"""
+from timeit import default_timer as _timer
+
+try:
+    from py.io import saferepr
+except ImportError:
+    saferepr = repr
+
+
+class Poll(object):
+    """
+    Tracks the attempts made to get a predicate to hold, and how long to wait before the next one.
+
+    The wait starts at `interval`, and is multiplied by `backoff` after every attempt, up to `max_interval`.
+    """
+
+    def __init__(self, timeout, interval, backoff, max_interval):
+        self.timeout = timeout
+        self.deadline = _timer() + timeout
+        self.delay = interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.attempts = 0
+        self.last = None
+        self.error = None
+
+    def check(self, value):
+        """Record the value returned by the predicate, return whether it holds."""
+        self.attempts += 1
+        self.last = value
+        self.error = None
+        return bool(value)
+
+    def check_error(self, error):
+        """Record an AssertionError raised by the predicate (which then doesn't hold yet)."""
+        self.attempts += 1
+        self.error = error
+        return False
+
+    def next_delay(self):
+        """Seconds to wait before the next attempt, or None once the timeout is reached."""
+        remaining = self.deadline - _timer()
+        if remaining <= 0:
+            return None
+        delay = min(self.delay, remaining)
+        self.delay = min(self.delay * self.backoff, self.max_interval)
+        return delay
+
+    def describe(self, predicate, msg=""):
+        name = getattr(predicate, "__name__", None) or saferepr(predicate)
+        if self.error is not None:
+            last = "last attempt raised %s: %s" % (type(self.error).__name__, self.error)
+        else:
+            last = "last value: %s" % saferepr(self.last)
+        text = "%s still false after %s attempts in %gs; %s" % (name, self.attempts, self.timeout, last)
+        return "%s: %s" % (msg, text) if msg else text
@@ -0,0 +1,34 @@
+"""
+``pytest.assume_eventually_async``, kept apart since it needs Python 3.5+ syntax.
+"""
+import asyncio
+import inspect
+
+from .eventually import Poll
+
+
+async def assume_eventually_async(predicate, timeout=5.0, interval=0.05, backoff=1.5, max_interval=1.0, msg=""):
+    """
+    Async version of ``pytest.assume_eventually``: waits with ``asyncio.sleep``, and `predicate`
+    may be a coroutine function.
+    """
+    __tracebackhide__ = True
+    from .plugin import assume
+
+    poll = Poll(timeout, interval, backoff, max_interval)
+    while True:
+        try:
+            value = predicate()
+            if inspect.isawaitable(value):
+                value = await value
+        except AssertionError as e:
+            ok = poll.check_error(e)
+        else:
+            ok = poll.check(value)
+        if ok:
+            return assume._assume(True, None, depth=1)
+
+        delay = poll.next_delay()
+        if delay is None:
+            return assume._assume(False, poll.describe(predicate, msg), depth=1)
+        await asyncio.sleep(delay)
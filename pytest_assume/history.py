@@ -0,0 +1,128 @@
+"""
+Local history of assumption outcomes across runs (``--assume-history=PATH``).
+
+At the end of each session, one row per (test, call site) is batch-inserted into
+a SQLite database, with the number of times the assumption passed and failed.
+``pytest-assume-history PATH`` (or ``python -m pytest_assume.history PATH``)
+then lists the flakiest (or most failing) call sites over the last runs.
+"""
+import argparse
+import sqlite3
+import sys
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    nodeid TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    failed INTEGER NOT NULL
+);
+-- Covers the per-run aggregations, so they never touch the table itself.
+CREATE INDEX IF NOT EXISTS outcomes_run ON outcomes (run_id, filename, line, passed, failed);
+CREATE INDEX IF NOT EXISTS outcomes_site ON outcomes (filename, line, run_id);
+CREATE INDEX IF NOT EXISTS outcomes_nodeid ON outcomes (nodeid, run_id);
+"""
+
+# One row per site over the selected runs: in how many runs it was checked, in how many it failed.
+SITES_QUERY = """
+SELECT filename, line, COUNT(*) AS runs, SUM(failures > 0) AS failed_runs, SUM(failures) AS failures
+FROM (
+    SELECT run_id, filename, line, SUM(failed) AS failures
+    FROM outcomes
+    WHERE run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)
+    GROUP BY run_id, filename, line
+)
+GROUP BY filename, line
+"""
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class History(object):
+    """Collects the per-site outcomes of a session, and writes them out in one transaction."""
+
+    def __init__(self, path):
+        self.path = path
+        self.started = time.time()
+        self._rows = []
+
+    def record(self, nodeid, stats):
+        """Add the per-site counters of an :class:`~pytest_assume.store.AssumptionStats`."""
+        for (filename, line), (passed, failed) in stats.sites.items():
+            self._rows.append((nodeid, filename, line, passed, failed))
+
+    def write(self):
+        """Store the run. Returns its id."""
+        conn = connect(self.path)
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO runs (started, finished) VALUES (?, ?)", (self.started, time.time())
+                )
+                run_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT INTO outcomes (run_id, nodeid, filename, line, passed, failed) VALUES (?, ?, ?, ?, ?, ?)",
+                    ((run_id,) + row for row in self._rows),
+                )
+        finally:
+            conn.close()
+        self._rows = []
+        return run_id
+
+
+def top_sites(conn, runs=30, limit=20, flaky=True):
+    """
+    The call sites with the most failing runs among the last `runs` runs.
+
+    :param flaky: Only keep the sites that both passed and failed over those runs.
+    :return: List of ``(filename, line, runs, failed_runs, failures)``.
+    """
+    query = "SELECT * FROM (%s) WHERE failed_runs > 0" % SITES_QUERY
+    if flaky:
+        query += " AND failed_runs < runs"
+    query += " ORDER BY failed_runs * 1.0 / runs DESC, failures DESC, filename, line LIMIT ?"
+    return conn.execute(query, (runs, limit)).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pytest-assume-history", description="Query a database written with --assume-history."
+    )
+    parser.add_argument("path", help="history database")
+    parser.add_argument("--runs", type=int, default=30, help="number of most recent runs considered (default: 30)")
+    parser.add_argument("--limit", type=int, default=20, help="number of sites listed (default: 20)")
+    parser.add_argument(
+        "--failing",
+        action="store_true",
+        help="list every failing site, not only the flaky ones (that both passed and failed)",
+    )
+    args = parser.parse_args(argv)
+
+    conn = connect(args.path)
+    try:
+        rows = top_sites(conn, runs=args.runs, limit=args.limit, flaky=not args.failing)
+    finally:
+        conn.close()
+
+    out = sys.stdout
+    out.write("%-60s %6s %8s %9s %9s\n" % ("site", "runs", "failed", "rate", "failures"))
+    for filename, line, runs, failed_runs, failures in rows:
+        site = "%s:%s" % (filename, line)
+        out.write("%-60s %6s %8s %8.1f%% %9s\n" % (site, runs, failed_runs, 100.0 * failed_runs / runs, failures))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,7 +20,10 @@ def pytest_assume_summary_report(failed_assumptions):
     """
     Hook to manipulate the summary that prints at the end.
     User can print the failure summary as per desired format.
-    failed_assumptions: List of all failed assume() calls
+    failed_assumptions: List of all failed assume() calls. Each one has `entry`, `locals`
+        (captured when this hook is implemented, or with --showlocals), `tb` (only for the
+        last one, unless --assume-keep-tracebacks is given), `filename`, `lineno` and `scope`,
+        and `repr()`/`longrepr()` methods.
 
     return: String representation of the summary report.
     """
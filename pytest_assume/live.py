@@ -0,0 +1,100 @@
+"""
+Live streaming of assumption failures (``--assume-live``).
+
+The test thread only appends a small tuple to a deque; a background thread
+formats and writes them out in batches, so hot loops aren't slowed down by I/O.
+"""
+import collections
+import io
+import os
+import socket
+import sys
+import threading
+import warnings
+
+
+class LiveStream(object):
+    """
+    Background writer for assumption failures.
+
+    :param write: Callable taking the text of a batch of failures.
+    :param close: Optional callable releasing the underlying file/socket.
+    :param interval: Seconds between two flushes.
+    """
+
+    def __init__(self, write, close=None, interval=0.2):
+        self._write = write
+        self._close = close
+        self._interval = interval
+        self._pending = collections.deque()
+        self._stopping = threading.Event()
+        self._error = None
+        #: Node id of the test currently running, set by the plugin.
+        self.nodeid = None
+
+        self._thread = threading.Thread(target=self._run, name="pytest-assume-live")
+        self._thread.daemon = True
+        self._thread.start()
+
+    @classmethod
+    def open(cls, dest, interval=0.2):
+        """
+        Open a stream to `dest`:
+
+        * ``-``: the terminal. A duplicate of the stdout file descriptor is used, so
+          the failures don't end up in the output captured for the test.
+        * ``unix:PATH``: a Unix domain socket listening at PATH.
+        * anything else: a file, which is appended to.
+        """
+        if dest == "-":
+            try:
+                stream = io.open(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+                close = stream.close
+            except (AttributeError, ValueError, OSError, io.UnsupportedOperation):
+                # No real file descriptor (e.g. stdout is already replaced), use it as-is.
+                stream = sys.stdout
+                close = None
+            return cls(lambda text: (stream.write(u"\n" + text), stream.flush()), close, interval)
+
+        if dest.startswith("unix:"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(dest[len("unix:"):])
+            return cls(lambda text: sock.sendall(text.encode("utf-8")), sock.close, interval)
+
+        stream = io.open(dest, "a", encoding="utf-8")
+        return cls(lambda text: (stream.write(text), stream.flush()), stream.close, interval)
+
+    def record(self, filename, line, context, message):
+        """Queue a failure. Called from the test thread, so this must stay cheap."""
+        self._pending.append((self.nodeid, filename, line, context, message))
+
+    def _run(self):
+        while not self._stopping.wait(self._interval):
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        pending = self._pending
+        lines = []
+        while pending:
+            nodeid, filename, line, context, message = pending.popleft()
+            text = context.strip()
+            if message:
+                text += u" ({})".format(message.splitlines()[0])
+            lines.append(u"ASSUMPTION FAILED {} {}:{}: {}\n".format(nodeid, filename, line, text))
+
+        if lines and self._error is None:
+            try:
+                self._write(u"".join(lines))
+            except (IOError, OSError) as e:
+                # Stop writing, but keep the test session going.
+                self._error = e
+
+    def close(self):
+        """Flush whatever is pending, stop the background thread and release the destination."""
+        self._stopping.set()
+        self._thread.join()
+        if self._close is not None:
+            self._close()
+        if self._error is not None:
+            warnings.warn("pytest-assume: live stream stopped after an error: %s" % self._error)
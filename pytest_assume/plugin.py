@@ -1,6 +1,11 @@
-import inspect
+import linecache
 import os.path
+import shutil
+import functools
+import sys
+import time
 from functools import partial
+from timeit import default_timer as _timer
 
 try:
     # Pytest 6.x
@@ -26,32 +31,68 @@ try:
 except ImportError:
     saferepr = repr
 
-_FAILED_ASSUMPTIONS = []
+from .compare import DEFAULT_CHUNK_SIZE, compare_close, compare_file
+from .eventually import Poll
+from .history import History
+from .live import LiveStream
+from .sampling import Sampler
+from .sites import SiteIndex
+from .workers import AssumeWorkers
+from .store import Assumption, AssumptionStats, AssumptionStore  # noqa: F401 (Assumption is re-exported)
 
+_FAILED_ASSUMPTIONS = AssumptionStore()
+_RELPATHS = {}
 
-class Assumption(object):
-    __slots__ = ["entry", "tb", "locals"]
 
-    def __init__(self, entry, tb, locals=None):
-        self.entry = entry
-        # TODO: trim the TB at init?
-        self.tb = tb
-        self.locals = locals
+def _relpath(filename):
+    try:
+        return _RELPATHS[filename]
+    except KeyError:
+        pass
+    try:
+        rel = os.path.relpath(filename)
+    except ValueError:
+        rel = filename  # filename is on a different mount than the current dir (Windows)
+    _RELPATHS[filename] = rel
+    return rel
 
-    def longrepr(self):
-        output = [self.entry, "Locals:"]
-        output.extend(self.locals)
 
-        return "\n".join(output)
+def _hook_is_implemented(hook):
+    """
+    Check whether anything besides this plugin implements `hook`, so that entries
+    only get formatted when someone is going to look at them.
+    """
+    try:
+        impls = hook.get_hookimpls()
+    except AttributeError:
+        # Older pluggy, can't tell.
+        return True
+    this_module = sys.modules[__name__]
+    return any(impl.plugin is not this_module for impl in impls)
+
 
-    def repr(self):
-        return self.entry
+def _cache_hook_impls():
+    """
+    Check once (rather than on every assumption) which hooks are implemented by someone else,
+    and so whether entries and locals are going to be looked at.
+    """
+    pytest._assume_pass_hooked = _hook_is_implemented(pytest._hook_assume_pass)
+    pytest._assume_fail_hooked = _hook_is_implemented(pytest._hook_assume_fail)
+    # A custom summary report may call longrepr(), which shows the locals.
+    pytest._assume_capture_locals = pytest._showlocals or _hook_is_implemented(pytest._hook_assume_summary_report)
 
 
 class FailedAssumption(AssertionError):
     pass
 
 
+class AssumptionAbort(FailedAssumption):
+    """Raised to stop a test early once too many of its assumptions failed (``--assume-abort-rate``)."""
+
+
+_NO_EXPR = object()
+
+
 class AssumeContextManager(object):
     """Context manager whose objects can be used for *soft-assertions*
 
@@ -70,59 +111,110 @@ class AssumeContextManager(object):
 
         ret = pytest.assume(expr, msg)
 
+    Only a fraction of the checks can be made, with ``--assume-sample-rate`` or per check::
+
+        pytest.assume(expr, msg, sample=0.01)
+        with pytest.assume(sample=0.01):
+            assert expr, msg
+
+    Sampled out checks are not recorded at all (the body of a *with* block still runs,
+    but its AssertionError is ignored).
+
     :param expr: Expression to 'assert' on.
     :param msg: Message to display if the assertion fails.
-    :return: True or False, according to `expr`
+    :param sample: Probability of checking the assumption, overriding ``--assume-sample-rate``.
+    :return: True or False, according to `expr`, or None if the check was sampled out.
     """
 
     def __init__(self):
-        self._enter_from_call = False
+        # How many frames up from __exit__ the caller's code is.
+        self._stack_level = 1
+        # Sampling rate of the next check (None for the session's rate).
+        self._sample = None
+        # Whether each of the checks in progress is sampled out (they nest, e.g. a
+        # pytest.assume() call within a `with pytest.assume:` block).
+        self._skips = []
 
     def __enter__(self):
         __tracebackhide__ = True
         self._last_status = None
+        sampler = getattr(pytest, "_assume_sampler", None)
+        self._skips.append(sampler is not None and not sampler.keep(self._sample))
+        self._sample = None
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         __tracebackhide__ = True
+        skip = self._skips.pop()
+        if exc_type is not None and issubclass(exc_type, AssumptionAbort):
+            # Raised by a nested check: let it end the test, rather than count as one more failure.
+            return
+        frame = sys._getframe(self._stack_level)
+        sites = getattr(pytest, "_assume_sites", None)
+        if sites is not None:
+            # Sampled out checks were still executed.
+            sites.hit(frame.f_code.co_filename, frame.f_lineno)
+
+        if skip:
+            # Sampled out: nothing is recorded, failures are ignored.
+            if exc_type is None or issubclass(exc_type, AssertionError):
+                _FAILED_ASSUMPTIONS.sampled_out += 1
+                return True
+            return
+
+        start = _timer()
         pretty_locals = None
-        entry = None
-        tb = None
-        stack_level = 2 if self._enter_from_call else 1
-        (frame, filename, line, funcname, contextlist) = inspect.stack()[stack_level][0:5]
         # get filename, line, and context
-        try:
-            filename = os.path.relpath(filename)
-        except ValueError:
-            pass  # filename is on a different mount than the current dir (Windows)
-
-        context = "" if contextlist is None else contextlist[0].lstrip()
+        filename = frame.f_code.co_filename
+        line = frame.f_lineno
+        context = linecache.getline(filename, line).lstrip()
+        filename = _relpath(filename)
 
         if exc_type is None:
-            # format entry
-            entry = u"{filename}:{line}: AssumptionSuccess\n>>\t{context}".format(**locals())
-            pytest._hook_assume_pass(lineno=line, entry=entry)
+            _FAILED_ASSUMPTIONS.add_pass(filename, line)
+            if pytest._assume_pass_hooked:
+                # format entry
+                entry = u"{filename}:{line}: AssumptionSuccess\n>>\t{context}".format(**locals())
+                pytest._hook_assume_pass(lineno=line, entry=entry)
 
+            _FAILED_ASSUMPTIONS.elapsed += _timer() - start
             self._last_status = True
             return True
 
         elif issubclass(exc_type, AssertionError):
-            if exc_val:
-                context += "{}: {}\n\n".format(exc_type.__name__, exc_val)
-
-            # format entry
-            entry = u"{filename}:{line}: AssumptionFailure\n>>\t{context}".format(**locals())
+            message = "{}: {}".format(exc_type.__name__, exc_val) if exc_val else None
 
             # Debatable whether we should display locals for
             # every failed assertion, or just the final one.
             # I'm defaulting to per-assumption, just because vars
             # can easily change between assumptions.
-            pretty_locals = [
-                "\t%-10s = %s" % (name, saferepr(val)) for name, val in frame.f_locals.items()
-            ]
-
-            pytest._hook_assume_fail(lineno=line, entry=entry)
-            _FAILED_ASSUMPTIONS.append(Assumption(entry, exc_tb, pretty_locals))
+            # They're only captured when they can be shown, though.
+            if pytest._assume_capture_locals:
+                pretty_locals = [
+                    "\t%-10s = %s" % (name, saferepr(val)) for name, val in frame.f_locals.items()
+                ]
+
+            _FAILED_ASSUMPTIONS.add_failure(
+                filename, line, context, message, pretty_locals, exc_tb, pytest._assume_keep_tracebacks
+            )
+            if pytest._assume_fail_hooked:
+                pytest._hook_assume_fail(lineno=line, entry=_FAILED_ASSUMPTIONS[-1].entry)
+
+            live = getattr(pytest, "_assume_live", None)
+            if live is not None:
+                live.record(filename, line, context, message)
+
+            _FAILED_ASSUMPTIONS.elapsed += _timer() - start
+
+            abort_rate = getattr(pytest, "_assume_abort_rate", None)
+            if abort_rate is not None:
+                failed = len(_FAILED_ASSUMPTIONS)
+                checked = failed + _FAILED_ASSUMPTIONS.passed
+                if checked >= pytest._assume_abort_after and failed > abort_rate * checked:
+                    raise AssumptionAbort(
+                        "Aborting: %s of %s assumptions failed (--assume-abort-rate=%s)"
+                        % (failed, checked, abort_rate)
+                    )
 
             self._last_status = False
             return True
@@ -131,20 +223,132 @@ class AssumeContextManager(object):
             # Another type of exception, let it rise uncaught
             return
 
-    def __call__(self, expr, msg=""):
+    def __call__(self, expr=_NO_EXPR, msg="", sample=None):
+        __tracebackhide__ = True
+        if expr is _NO_EXPR:
+            # with pytest.assume(sample=...):
+            self._sample = sample
+            return self
+        return self._assume(expr, msg, depth=1, sample=sample)
+
+    def _assume(self, expr, msg, depth, sample=1.0):
+        """
+        Check `expr`, reporting it against the code `depth` frames up from this method
+        (i.e. 1 for the caller of a helper that calls this method).
+
+        `sample` is the probability of actually checking it (None for the session's rate).
+        """
         __tracebackhide__ = True
-        self._enter_from_call = True
-        with self:
-            if msg:
-                assert expr, msg
-            else:
-                assert expr
-        self._enter_from_call = False
+        self._sample = sample
+        self._stack_level = depth + 2
+        try:
+            with self:
+                if msg:
+                    assert expr, msg
+                else:
+                    assert expr
+        finally:
+            self._stack_level = 1
         return self._last_status
 
 
 assume = AssumeContextManager()
 
+if sys.version_info >= (3, 5):
+    from .eventually_async import assume_eventually_async
+else:
+    assume_eventually_async = None
+
+
+def assume_close(actual, expected, rel=None, abs=None, max_report=10):
+    """
+    Soft-assert that two numbers, sequences or arrays are element-wise equal within a tolerance.
+
+    The tolerances follow the rules of ``pytest.approx``. The whole comparison is done in one
+    vectorized pass when NumPy is available, and a single failure is recorded, carrying
+    the number of mismatches, the largest absolute/relative errors and the first offending indices.
+
+    :param actual: Number, sequence (possibly nested) or array.
+    :param expected: Number, sequence or array of the same shape (or a single number).
+    :param rel: Relative tolerance.
+    :param abs: Absolute tolerance.
+    :param max_report: How many offending indices to list.
+    :return: True or False, according to the comparison.
+    """
+    __tracebackhide__ = True
+    mismatch = compare_close(actual, expected, rel=rel, abs=abs, max_report=max_report)
+    return assume._assume(mismatch is None, mismatch, depth=1)
+
+
+def assume_eventually(predicate, timeout=5.0, interval=0.05, backoff=1.5, max_interval=1.0, msg=""):
+    """
+    Soft-assert that `predicate` becomes true within `timeout` seconds.
+
+    `predicate` is called until it returns a true value (an AssertionError it raises counts as false),
+    waiting `interval` seconds after the first attempt, then `backoff` times longer after each
+    attempt, up to `max_interval`. On timeout, the failure gives the number of attempts and the
+    last value returned.
+
+    :return: True or False, according to whether `predicate` held in time.
+    """
+    __tracebackhide__ = True
+    poll = Poll(timeout, interval, backoff, max_interval)
+    while True:
+        try:
+            ok = poll.check(predicate())
+        except AssertionError as e:
+            ok = poll.check_error(e)
+        if ok:
+            return assume._assume(True, None, depth=1)
+
+        delay = poll.next_delay()
+        if delay is None:
+            return assume._assume(False, poll.describe(predicate, msg), depth=1)
+        time.sleep(delay)
+
+
+def _update_golden(actual, golden):
+    directory = os.path.dirname(golden)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    if isinstance(actual, (bytes, bytearray, memoryview)):
+        with open(golden, "wb") as f:
+            f.write(actual)
+    else:
+        shutil.copyfile(str(actual), golden)
+
+
+def assume_matches_file(actual, golden, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Soft-assert that some bytes, or a file, are identical to a golden file.
+
+    Files are memory-mapped and compared chunk by chunk, stopping at the first difference.
+    The failure gives the byte offset (and line/column) of the first divergence.
+
+    With ``--assume-update-goldens``, the golden file is (re)written from `actual` instead.
+
+    :param actual: Bytes, or path of the file to check.
+    :param golden: Path of the reference file.
+    :param chunk_size: Number of bytes compared at a time.
+    :return: True or False, according to the comparison.
+    """
+    __tracebackhide__ = True
+    golden = str(golden)
+    if not isinstance(actual, (bytes, bytearray, memoryview)) and not os.path.exists(str(actual)):
+        return assume._assume(False, "file %s does not exist" % actual, depth=1)
+
+    exists = os.path.exists(golden)
+    if getattr(pytest, "_assume_update_goldens", False):
+        if not exists or compare_file(actual, golden, chunk_size) is not None:
+            _update_golden(actual, golden)
+        return assume._assume(True, None, depth=1)
+
+    if exists:
+        mismatch = compare_file(actual, golden, chunk_size)
+    else:
+        mismatch = "golden file %s does not exist (use --assume-update-goldens to create it)" % golden
+    return assume._assume(mismatch is None, mismatch, depth=1)
+
 
 def pytest_addhooks(pluginmanager):
     """ This example assumes the hooks are grouped in the 'hooks' module. """
@@ -154,6 +358,114 @@ def pytest_addhooks(pluginmanager):
     pluginmanager.add_hookspecs(hooks)
 
 
+def pytest_addoption(parser):
+    group = parser.getgroup("assume")
+    group.addoption(
+        "--assume-live",
+        metavar="DEST",
+        default=None,
+        help="stream assumption failures as they happen, to DEST: '-' for the terminal, "
+        "'unix:PATH' for a Unix socket, or a file path.",
+    )
+    group.addoption(
+        "--assume-live-interval",
+        type=float,
+        default=0.2,
+        metavar="SECONDS",
+        help="how often the live stream is flushed (default: 0.2).",
+    )
+    group.addoption(
+        "--assume-update-goldens",
+        action="store_true",
+        default=False,
+        help="rewrite the golden files of pytest.assume_matches_file() instead of comparing against them.",
+    )
+    group.addoption(
+        "--assume-report-sites",
+        type=int,
+        default=10,
+        metavar="N",
+        help="maximum number of failing assumption sites listed in the user_properties "
+        "(and --junitxml properties) of a test (default: 10).",
+    )
+    group.addoption(
+        "--assume-history",
+        metavar="PATH",
+        default=None,
+        help="add the per call site outcomes of this run to the SQLite database at PATH "
+        "(query it with pytest-assume-history).",
+    )
+    group.addoption(
+        "--assume-sample-rate",
+        type=float,
+        default=1.0,
+        metavar="RATE",
+        help="only check a fraction RATE (0-1) of the assumptions (default: 1, all of them).",
+    )
+    group.addoption(
+        "--assume-sample-seed",
+        type=int,
+        default=0,
+        metavar="SEED",
+        help="seed of the sampling; combined with the test node id (default: 0).",
+    )
+    group.addoption(
+        "--assume-coverage",
+        action="store_true",
+        default=False,
+        help="list the assumptions of the collected test modules that were never executed.",
+    )
+    group.addoption(
+        "--assume-keep-tracebacks",
+        action="store_true",
+        default=False,
+        help="keep the traceback of every failed assumption (only the last one is kept by default), "
+        "for pytest_assume_summary_report implementations using their tb attribute.",
+    )
+    group.addoption(
+        "--assume-abort-rate",
+        type=float,
+        default=None,
+        metavar="RATE",
+        help="abort a test once more than RATE (0-1) of its assumptions have failed.",
+    )
+    group.addoption(
+        "--assume-abort-after",
+        type=int,
+        default=100,
+        metavar="N",
+        help="minimum number of assumptions checked before --assume-abort-rate applies (default: 100).",
+    )
+
+
+# Session state kept in the pytest namespace, for the hot paths.
+_PYTEST_STATE = (
+    "_assume_pass_hooked",
+    "_assume_fail_hooked",
+    "_assume_capture_locals",
+    "_assume_keep_tracebacks",
+    "_assume_update_goldens",
+    "_assume_report_sites",
+    "_assume_abort_rate",
+    "_assume_abort_after",
+    "_assume_sampler",
+    "_assume_history",
+    "_assume_live",
+    "_assume_sites",
+)
+
+
+def _install_api():
+    """Add the public functions to the pytest namespace (also done in spawned worker processes)."""
+    pytest.assume = assume
+    pytest.assume_close = assume_close
+    pytest.assume_matches_file = assume_matches_file
+    pytest.assume_eventually = assume_eventually
+    pytest.assume_workers = AssumeWorkers
+    if assume_eventually_async is not None:
+        pytest.assume_eventually_async = assume_eventually_async
+
+
 def pytest_configure(config):
     """
     Add tracking lists to the pytest namespace, so we can
@@ -161,7 +473,7 @@ def pytest_configure(config):
 
     :return: Dictionary of name: values added to the pytest namespace.
     """
-    pytest.assume = assume
+    _install_api()
     pytest._showlocals = config.getoption("showlocals")
 
     # As per pytest documentation: https://docs.pytest.org/en/latest/deprecations.html
@@ -171,6 +483,77 @@ def pytest_configure(config):
     pytest._hook_assume_pass = config.pluginmanager.hook.pytest_assume_pass
     pytest._hook_assume_summary_report = config.pluginmanager.hook.pytest_assume_summary_report
 
+    # Restored at unconfigure, for pytest sessions run from within a test (e.g. pytester).
+    config._assume_previous_state = dict((name, getattr(pytest, name, None)) for name in _PYTEST_STATE)
+    _cache_hook_impls()
+    pytest._assume_keep_tracebacks = config.getoption("assume_keep_tracebacks")
+    pytest._assume_update_goldens = config.getoption("assume_update_goldens")
+    pytest._assume_report_sites = config.getoption("assume_report_sites")
+    pytest._assume_abort_rate = config.getoption("assume_abort_rate")
+    pytest._assume_abort_after = config.getoption("assume_abort_after")
+    pytest._assume_sampler = Sampler(config.getoption("assume_sample_rate"), config.getoption("assume_sample_seed"))
+    pytest._assume_sites = SiteIndex() if config.getoption("assume_coverage") else None
+    history = config.getoption("assume_history")
+    pytest._assume_history = History(history) if history else None
+
+    pytest._assume_live = None
+    live_dest = config.getoption("assume_live")
+    if live_dest:
+        try:
+            pytest._assume_live = LiveStream.open(live_dest, config.getoption("assume_live_interval"))
+        except (IOError, OSError) as e:
+            raise pytest.UsageError("--assume-live: can't open %s: %s" % (live_dest, e))
+
+
+def pytest_sessionfinish(session):
+    history = getattr(pytest, "_assume_history", None)
+    if history is not None:
+        history.write()
+
+
+def pytest_unconfigure(config):
+    live = getattr(pytest, "_assume_live", None)
+    if live is not None:
+        live.close()
+    for name, value in getattr(config, "_assume_previous_state", {}).items():
+        setattr(pytest, name, value)
+
+
+def pytest_runtest_logstart(nodeid, location):
+    pytest._assume_sampler.reset(nodeid)
+    live = getattr(pytest, "_assume_live", None)
+    if live is not None:
+        live.nodeid = nodeid
+
+
+def pytest_collection_finish(session):
+    # conftest.py files of sub-directories are only loaded during the collection.
+    _cache_hook_impls()
+
+
+def pytest_collection_modifyitems(session, config, items):
+    sites = getattr(pytest, "_assume_sites", None)
+    if sites is not None:
+        filenames = set(str(getattr(item, "path", None) or item.fspath) for item in items)
+        sites.load(sorted(f for f in filenames if f.endswith(".py")), getattr(config, "cache", None))
+
+
+def pytest_terminal_summary(terminalreporter):
+    sampler = getattr(pytest, "_assume_sampler", None)
+    if sampler is not None and sampler.sampled_out:
+        terminalreporter.write_line("pytest-assume: %s assumption checks sampled out" % sampler.sampled_out)
+
+    sites = getattr(pytest, "_assume_sites", None)
+    if sites is not None:
+        unexecuted = sites.unexecuted()
+        terminalreporter.write_sep("-", "assumption coverage")
+        terminalreporter.write_line(
+            "%s of %s assumption sites executed" % (len(sites.sites) - len(unexecuted), len(sites.sites))
+        )
+        for filename, line in unexecuted:
+            source = linecache.getline(filename, line).strip()
+            terminalreporter.write_line("%s:%s: never executed: %s" % (_relpath(filename), line, source))
+
 
 @pytest.hookimpl(tryfirst=True)
 def pytest_assume_fail(lineno, entry):
@@ -201,6 +584,165 @@ def restore_xfail(item):
         item._evalxfail = mark_eval(item)
 
 
+def _collect_stats(item, store, when):
+    """
+    Accumulate the statistics of each phase of a test, and attach them to its
+    ``user_properties`` (and so to ``--junitxml`` reports) once the test is done.
+    """
+    stats = getattr(item, "_assume_stats", None)
+    if stats is None:
+        stats = item._assume_stats = AssumptionStats()
+    stats.update(store)
+
+    if when == "teardown" and stats:
+        if getattr(item, "user_properties", None) is not None:
+            item.user_properties.extend(stats.properties(pytest._assume_report_sites))
+        history = getattr(pytest, "_assume_history", None)
+        if history is not None:
+            history.record(item.nodeid, stats)
+
+
+def _summary_report(failed_assumptions):
+    content = pytest._hook_assume_summary_report(failed_assumptions=failed_assumptions)
+
+    # Pluggy module returns list for multiple implementation of hooks
+    # The user, while implementing custom hook pytest_assume_summary_report, will return "string"
+    # Default hook is always present as list element 0
+    if len(content) == 1:  # default length
+        # Uses default hook
+        return content[0]
+    else:
+        # User created hook, if any
+        return content[1]
+
+
+def _per_example(inner_test):
+    """
+    Wrap the body of a Hypothesis test, so that each generated example starts with no
+    failed assumptions, and ends with a FailedAssumption if any failed (which Hypothesis
+    can then shrink). Per-site counters keep adding up over the examples.
+
+    The sampling is re-seeded from the test and the arguments of every example, so that
+    replaying an example checks the same assumptions.
+    """
+
+    @functools.wraps(inner_test)
+    def wrapper(*args, **kwargs):
+        __tracebackhide__ = True
+        sampler = getattr(pytest, "_assume_sampler", None)
+        if sampler is not None:
+            # Parametrized tests share the wrapper: the node id is the one of the test running.
+            example = repr(args) + repr(sorted(kwargs.items(), key=lambda item: item[0]))
+            sampler.reset(sampler.nodeid, example)
+        failed_assumptions = _FAILED_ASSUMPTIONS
+        failed_assumptions.discard_failures()
+        try:
+            result = inner_test(*args, **kwargs)
+            if failed_assumptions:
+                msg = "\n%s Failed Assumptions:\n\n%s" % (
+                    len(failed_assumptions),
+                    _summary_report(failed_assumptions),
+                )
+                # Reported through the exception, which Hypothesis re-raises for the final example.
+                raise_(FailedAssumption, FailedAssumption(msg), failed_assumptions.last_tb)
+            return result
+        finally:
+            # Also when the example failed otherwise: its assumptions belong to it, not to the test.
+            failed_assumptions.discard_failures()
+
+    wrapper._assume_per_example = True
+    return wrapper
+
+
+def _wrap_hypothesis(item):
+    handle = getattr(getattr(item, "obj", None), "hypothesis", None)
+    inner_test = getattr(handle, "inner_test", None)
+    if inner_test is not None and not getattr(inner_test, "_assume_per_example", False):
+        handle.inner_test = _per_example(inner_test)
+
+
+def _raise_failed_assumptions(item, outcome, when):
+    """
+    Report the assumptions collected during one phase of a test (setup, call or teardown),
+    by raising a FailedAssumption if any of them failed.
+    """
+    __tracebackhide__ = True
+    failed_assumptions = _FAILED_ASSUMPTIONS
+    _collect_stats(item, failed_assumptions, when)
+    if not failed_assumptions:
+        # Drop the pass counters of this phase.
+        _FAILED_ASSUMPTIONS.clear()
+        return
+
+    failed_count = len(failed_assumptions)
+    root_msg = "\n%s Failed Assumptions" % failed_count
+    if when != "call":
+        root_msg += " in %s" % when
+    if failed_assumptions.sampled_out:
+        root_msg += " (%s sampled out)" % failed_assumptions.sampled_out
+    root_msg += ":\n"
+
+    content = _summary_report(failed_assumptions)
+
+    last_tb = failed_assumptions.last_tb
+
+    _FAILED_ASSUMPTIONS.clear()
+    if outcome and outcome.excinfo:
+        # Xfailed test, but with strict=True. This is done via the pytest_pyfunc_call() hook, which
+        # is before our hook.
+        if when == "call" and "[XPASS(strict)]" in str(outcome.excinfo[1]):
+            restore_xfail(item)
+            raise_(FailedAssumption, FailedAssumption("%s\n%s" % (root_msg, content)), last_tb)
+        root_msg = "\nOriginal Failure:\n\n>> %s\n" % repr(outcome.excinfo[1]) + root_msg
+        raise_(
+            FailedAssumption,
+            FailedAssumption(root_msg + "\n" + content),
+            outcome.excinfo[2],
+        )
+    else:
+        exc = FailedAssumption(root_msg + "\n" + content)
+        # Note: raising here so that we guarantee a failure.
+        raise_(FailedAssumption, exc, last_tb)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    """
+    Label the assumptions made while a fixture sets up or tears down, so that
+    checks done once in a module or session scoped fixture show where they came from.
+    """
+    label = "%s-scoped fixture '%s'" % (fixturedef.scope, fixturedef.argname)
+
+    def _enter():
+        _FAILED_ASSUMPTIONS.scope = label
+
+    def _leave():
+        _FAILED_ASSUMPTIONS.scope = None
+
+    # Finalizers run in reverse order, so these two bracket the fixture's own teardown.
+    fixturedef.addfinalizer(_leave)
+    previous = _FAILED_ASSUMPTIONS.scope
+    _enter()
+    try:
+        yield
+    finally:
+        _FAILED_ASSUMPTIONS.scope = previous
+        fixturedef.addfinalizer(_enter)
+
+
+@pytest.hookimpl(hookwrapper=True, tryfirst=True)
+def pytest_runtest_setup(item):
+    """
+    Assumptions made while fixtures set up are reported as an error in the setup of the test.
+    """
+    __tracebackhide__ = True
+    outcome = None
+    try:
+        outcome = yield
+    finally:
+        _raise_failed_assumptions(item, outcome, "setup")
+
+
 @pytest.hookimpl(hookwrapper=True, tryfirst=True)
 def pytest_runtest_call(item):
     """
@@ -211,43 +753,23 @@ def pytest_runtest_call(item):
     Note: I'm not happy with exception handling in here.
     """
     __tracebackhide__ = True
+    _wrap_hypothesis(item)
     outcome = None
     try:
         outcome = yield
     finally:
-        failed_assumptions = _FAILED_ASSUMPTIONS
-        if failed_assumptions:
-            failed_count = len(failed_assumptions)
-            root_msg = "\n%s Failed Assumptions:\n" % failed_count
-
-            content = pytest._hook_assume_summary_report(failed_assumptions=failed_assumptions)
-
-            # Pluggy module returns list for multiple implementation of hooks
-            # The user, while implementing custom hook pytest_assume_summary_report, will return "string"
-            # Default hook is always present as list element 0
-            if len(content) == 1:  # default length
-                # Uses default hook
-                content = content[0]
-            else:
-                # User created hook, if any
-                content = content[1]
-
-            last_tb = failed_assumptions[-1].tb
-
-            del _FAILED_ASSUMPTIONS[:]
-            if outcome and outcome.excinfo:
-                # Xfailed test, but with strict=True. This is done via the pytest_pyfunc_call() hook, which
-                # is before our hook.
-                if "[XPASS(strict)]" in str(outcome.excinfo[1]):
-                    restore_xfail(item)
-                    raise_(FailedAssumption, FailedAssumption("%s\n%s" % (root_msg, content)), last_tb)
-                root_msg = "\nOriginal Failure:\n\n>> %s\n" % repr(outcome.excinfo[1]) + root_msg
-                raise_(
-                    FailedAssumption,
-                    FailedAssumption(root_msg + "\n" + content),
-                    outcome.excinfo[2],
-                )
-            else:
-                exc = FailedAssumption(root_msg + "\n" + content)
-                # Note: raising here so that we guarantee a failure.
-                raise_(FailedAssumption, exc, last_tb)
+        _raise_failed_assumptions(item, outcome, "call")
+
+
+@pytest.hookimpl(hookwrapper=True, tryfirst=True)
+def pytest_runtest_teardown(item, nextitem):
+    """
+    Assumptions made while fixtures tear down (including higher scoped fixtures finishing
+    after the last test using them) are reported as an error in the teardown of the test.
+    """
+    __tracebackhide__ = True
+    outcome = None
+    try:
+        outcome = yield
+    finally:
+        _raise_failed_assumptions(item, outcome, "teardown")
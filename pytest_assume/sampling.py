@@ -0,0 +1,43 @@
+"""
+Deterministic sampling of assumptions (``--assume-sample-rate`` and ``sample=``).
+"""
+import random
+import zlib
+
+
+class Sampler(object):
+    """
+    Decides which assumptions are checked, when only a fraction of them should be.
+
+    The random sequence is re-seeded for every test from `seed` and its node id, so a given
+    test checks the same assumptions from one run to the next.
+    """
+
+    def __init__(self, rate=1.0, seed=0):
+        self.rate = rate
+        self.seed = seed
+        #: Number of checks sampled out over the session.
+        self.sampled_out = 0
+        #: Node id of the test the sampling was last seeded for.
+        self.nodeid = None
+        self._random = random.Random(seed)
+
+    def reset(self, nodeid, example=None):
+        """
+        Re-seed for the test `nodeid`, and optionally one of its `example`-s (e.g. generated
+        by Hypothesis), so that running it again checks the same assumptions.
+        """
+        self.nodeid = nodeid
+        key = "%s:%s" % (self.seed, nodeid)
+        if example is not None:
+            key += ":%s" % example
+        self._random.seed(zlib.crc32(key.encode("utf-8")) & 0xFFFFFFFF)
+
+    def keep(self, rate=None):
+        """Whether to check the next assumption, at `rate` (the session's rate by default)."""
+        if rate is None:
+            rate = self.rate
+        if rate >= 1 or self._random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
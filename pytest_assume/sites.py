@@ -0,0 +1,126 @@
+"""
+Index of the assumption call sites of the collected test modules (``--assume-coverage``).
+
+Test modules are parsed once at collection time (the results are kept in the pytest
+cache, keyed by file modification time and size), to find every ``pytest.assume(...)``,
+``with pytest.assume:`` and ``pytest.assume_*(...)`` site. At runtime, an executed
+assumption is matched to its site with a dictionary lookup.
+"""
+import ast
+import os
+
+CACHE_KEY = "pytest-assume/sites"
+
+ASSUME_NAMES = frozenset(
+    ["assume", "assume_close", "assume_matches_file", "assume_eventually", "assume_eventually_async"]
+)
+ASSUME_MODULES = frozenset(["pytest", "pytest_assume", "pytest_assume.plugin"])
+
+
+def _imported_names(tree):
+    """Local name -> assume* function, for the names imported from pytest (or this plugin)."""
+    imported = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module in ASSUME_MODULES:
+            for alias in node.names:
+                if alias.name in ASSUME_NAMES:
+                    imported[alias.asname or alias.name] = alias.name
+    return imported
+
+
+def _is_assume(node, imported, names=ASSUME_NAMES):
+    """
+    `pytest.assume*`, or a bare name imported from pytest: another `assume` (e.g. Hypothesis') isn't a site.
+    """
+    if isinstance(node, ast.Attribute):
+        return node.attr in names and isinstance(node.value, ast.Name) and node.value.id == "pytest"
+    return isinstance(node, ast.Name) and imported.get(node.id) in names
+
+
+def _last_line(node):
+    end = getattr(node, "end_lineno", None)
+    if end is None:
+        # Python < 3.8
+        end = max(getattr(child, "lineno", 0) for child in ast.walk(node))
+    return end
+
+
+def scan(source):
+    """
+    Find the assumption sites of some source code.
+
+    :return: Sorted list of ``[first_line, last_line]`` of every site.
+    """
+    tree = ast.parse(source)
+    imported = _imported_names(tree)
+    sites = []
+    context_managers = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.With):
+            # Python 2 has a single context manager per With node.
+            for item in getattr(node, "items", None) or [node]:
+                expr = item.context_expr
+                if isinstance(expr, ast.Call):
+                    context_managers.add(expr)
+                    expr = expr.func
+                if _is_assume(expr, imported, ("assume",)):
+                    sites.append([node.lineno, _last_line(node)])
+                    break
+        elif isinstance(node, ast.Call) and node not in context_managers and _is_assume(node.func, imported):
+            sites.append([node.lineno, _last_line(node)])
+    return sorted(sites)
+
+
+class SiteIndex(object):
+    """The assumption sites of a set of files, and which of them were executed."""
+
+    def __init__(self):
+        #: filename -> {line: site id}, for every line a site spans.
+        self._lines = {}
+        #: (filename, first line, last line) of each site.
+        self.sites = []
+        self._hits = bytearray()
+
+    def load(self, filenames, cache=None):
+        """Index `filenames`, reusing (and updating) the scans kept in the pytest `cache`."""
+        cached = cache.get(CACHE_KEY, {}) if cache is not None else {}
+        updated = {}
+        for filename in filenames:
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            entry = cached.get(filename)
+            if entry is None or entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size:
+                try:
+                    with open(filename, "rb") as f:
+                        sites = scan(f.read())
+                except (SyntaxError, ValueError, IOError):
+                    continue
+                entry = {"mtime": stat.st_mtime, "size": stat.st_size, "sites": sites}
+            updated[filename] = entry
+            self._add(filename, entry["sites"])
+
+        if cache is not None and any(cached.get(f) != entry for f, entry in updated.items()):
+            cached.update(updated)
+            cache.set(CACHE_KEY, cached)
+
+    def _add(self, filename, sites):
+        lines = self._lines.setdefault(filename, {})
+        for first, last in sites:
+            site = len(self.sites)
+            self.sites.append((filename, first, last))
+            self._hits.append(0)
+            for line in range(first, last + 1):
+                # Nested sites (an assumption within a `with pytest.assume:` block) are scanned last.
+                lines[line] = site
+
+    def hit(self, filename, line):
+        """Mark the site at `filename`:`line` as executed, if there is one."""
+        site = self._lines.get(filename, {}).get(line)
+        if site is not None:
+            self._hits[site] = 1
+
+    def unexecuted(self):
+        """(filename, first line) of the sites that were never executed."""
+        return [(filename, first) for (filename, first, _), hit in zip(self.sites, self._hits) if not hit]
@@ -0,0 +1,316 @@
+"""
+Compact storage for the assumptions collected while a test runs.
+
+Rather than keeping one formatted string (plus a list of formatted locals) per
+failure, records are kept in array-backed columns that point into interned
+tables of filenames and messages. The text is only produced when a report is
+actually rendered, through :class:`Assumption` views.
+"""
+from array import array
+from collections import OrderedDict
+
+from six.moves import intern
+
+
+class Assumption(object):
+    """
+    Lightweight, read-only view of a single failed assumption.
+
+    Keeps the historical ``entry``/``tb``/``locals`` attributes and the
+    ``repr()``/``longrepr()`` methods used by ``pytest_assume_summary_report``.
+    """
+
+    __slots__ = ["_store", "_index"]
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def entry(self):
+        return self._store.format_entry(self._index)
+
+    @property
+    def tb(self):
+        return self._store.traceback(self._index)
+
+    @property
+    def locals(self):
+        return self._store.format_locals(self._index)
+
+    @property
+    def scope(self):
+        return self._store.scope_of(self._index)
+
+    @property
+    def filename(self):
+        return self._store.filename(self._index)
+
+    @property
+    def lineno(self):
+        return self._store.lineno(self._index)
+
+    def longrepr(self):
+        output = [self.entry, "Locals:"]
+        output.extend(self.locals)
+
+        return "\n".join(output)
+
+    def repr(self):
+        return self.entry
+
+
+class AssumptionStore(object):
+    """
+    Columnar store of assumption outcomes.
+
+    * Sites (filename/line pairs) are kept once, with per-site pass and fail counters.
+    * Every failure is a row of integer indices: its site, its source context, its
+      error message, the fixture it was made in and its slice of the shared locals pool.
+    * Strings (source lines, messages, formatted locals) live once in a message table.
+
+    Behaves as a read-only sequence of :class:`Assumption` views over the failures.
+    """
+
+    def __init__(self):
+        #: Label of the fixture currently setting up/tearing down, if any.
+        self.scope = None
+        self.clear()
+
+    def clear(self):
+        self._filenames = []
+        self._filename_index = {}
+
+        self._site_index = {}
+        self.site_file = array("l")
+        self.site_line = array("l")
+        self.site_passed = array("l")
+        self.site_failed = array("l")
+
+        self.discard_failures()
+        self.passed = 0
+        self.sampled_out = 0
+        #: Time spent (in seconds) recording the assumptions.
+        self.elapsed = 0.0
+        self.last_tb = None
+
+    def discard_failures(self):
+        """Drop the failure records (and their messages), but keep the per-site counters."""
+        self._messages = []
+        self._message_index = {}
+
+        self.rec_site = array("l")
+        self.rec_context = array("l")
+        self.rec_message = array("l")
+        self.rec_scope = array("l")
+        self.rec_locals = array("l")
+        self.locals_pool = array("l")
+        #: Index -> traceback, for the failures whose traceback was kept.
+        self._tracebacks = {}
+        self.last_tb = None
+
+    # Interning helpers
+
+    def _intern_filename(self, filename):
+        idx = self._filename_index.get(filename)
+        if idx is None:
+            idx = len(self._filenames)
+            self._filenames.append(intern(str(filename)))
+            self._filename_index[filename] = idx
+        return idx
+
+    def _intern_message(self, message):
+        if message is None:
+            return -1
+        idx = self._message_index.get(message)
+        if idx is None:
+            idx = len(self._messages)
+            self._messages.append(message)
+            self._message_index[message] = idx
+        return idx
+
+    def _site(self, filename, line):
+        key = (self._intern_filename(filename), line)
+        idx = self._site_index.get(key)
+        if idx is None:
+            idx = len(self.site_file)
+            self._site_index[key] = idx
+            self.site_file.append(key[0])
+            self.site_line.append(line)
+            self.site_passed.append(0)
+            self.site_failed.append(0)
+        return idx
+
+    # Recording
+
+    def add_pass(self, filename, line, count=1):
+        self.site_passed[self._site(filename, line)] += count
+        self.passed += count
+
+    def add_failure(self, filename, line, context, message=None, locals=None, tb=None, keep_tb=False):
+        """
+        Record a failure. Only the traceback of the last failure is kept (older ones would keep
+        their frames alive), unless `keep_tb` is set.
+        """
+        site = self._site(filename, line)
+        self.site_failed[site] += 1
+        if keep_tb:
+            self._tracebacks[len(self.rec_site)] = tb
+
+        self.rec_site.append(site)
+        self.rec_context.append(self._intern_message(context))
+        self.rec_message.append(self._intern_message(message))
+        self.rec_scope.append(self._intern_message(self.scope))
+        if locals is None:
+            self.rec_locals.append(-1)
+        else:
+            self.rec_locals.append(len(self.locals_pool))
+            self.locals_pool.append(len(locals))
+            self.locals_pool.extend(self._intern_message(x) for x in locals)
+        self.last_tb = tb
+
+    def export(self):
+        """
+        Picklable copy of the records (tracebacks aside), to be :meth:`merge`-d into another store.
+        """
+        failures = [
+            (
+                self.filename(i),
+                self.lineno(i),
+                self._messages[self.rec_context[i]],
+                self._messages[self.rec_message[i]] if self.rec_message[i] >= 0 else None,
+                self.format_locals(i) if self.rec_locals[i] >= 0 else None,
+            )
+            for i in range(len(self))
+        ]
+        passes = [(filename, line, passed) for filename, line, passed, _ in self.sites() if passed]
+        return failures, passes, self.sampled_out
+
+    def merge(self, exported, scope=None):
+        """Add records from :meth:`export`, labelled with `scope` (e.g. the process they come from)."""
+        failures, passes, sampled_out = exported
+        previous, self.scope = self.scope, scope
+        last_tb = self.last_tb
+        try:
+            for filename, line, context, message, locals in failures:
+                self.add_failure(filename, line, context, message, locals)
+        finally:
+            self.scope = previous
+            self.last_tb = last_tb
+        for filename, line, passed in passes:
+            self.add_pass(filename, line, passed)
+        self.sampled_out += sampled_out
+
+    # Rendering
+
+    def filename(self, index):
+        return self._filenames[self.site_file[self.rec_site[index]]]
+
+    def lineno(self, index):
+        return self.site_line[self.rec_site[index]]
+
+    def traceback(self, index):
+        tb = self._tracebacks.get(index)
+        if tb is None and index == len(self) - 1:
+            return self.last_tb
+        return tb
+
+    def scope_of(self, index):
+        scope = self.rec_scope[index]
+        return self._messages[scope] if scope >= 0 else None
+
+    def format_entry(self, index):
+        context = self._messages[self.rec_context[index]]
+        message = self.rec_message[index]
+        if message >= 0:
+            context += u"{}\n\n".format(self._messages[message])
+        scope = self.scope_of(index)
+        scope = u" (in {})".format(scope) if scope else u""
+        return u"{}:{}: AssumptionFailure{}\n>>\t{}".format(self.filename(index), self.lineno(index), scope, context)
+
+    def format_locals(self, index):
+        start = self.rec_locals[index]
+        if start < 0:
+            return []
+        count = self.locals_pool[start]
+        return [self._messages[x] for x in self.locals_pool[start + 1 : start + 1 + count]]
+
+    def sites(self):
+        """Yield ``(filename, line, passed, failed)`` for every site seen."""
+        for idx in range(len(self.site_file)):
+            yield (
+                self._filenames[self.site_file[idx]],
+                self.site_line[idx],
+                self.site_passed[idx],
+                self.site_failed[idx],
+            )
+
+    # Sequence protocol over the failures
+
+    def __len__(self):
+        return len(self.rec_site)
+
+    def __bool__(self):
+        return len(self.rec_site) > 0
+
+    __nonzero__ = __bool__
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Assumption(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("assumption index out of range")
+        return Assumption(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Assumption(self, i)
+
+
+class AssumptionStats(object):
+    """
+    Counters of the assumptions made over all the phases of a test, outliving the per-phase store.
+    """
+
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.sampled_out = 0
+        self.elapsed = 0.0
+        #: (filename, line) -> [passed, failed]
+        self.sites = OrderedDict()
+
+    def update(self, store):
+        self.passed += store.passed
+        # Not len(store): per-site counters also cover the failures already discarded.
+        self.failed += sum(store.site_failed)
+        self.sampled_out += store.sampled_out
+        self.elapsed += store.elapsed
+        for filename, line, passed, failed in store.sites():
+            counts = self.sites.setdefault((filename, line), [0, 0])
+            counts[0] += passed
+            counts[1] += failed
+
+    def __bool__(self):
+        return bool(self.passed or self.failed or self.sampled_out)
+
+    __nonzero__ = __bool__
+
+    def properties(self, max_sites):
+        """
+        ``(name, value)`` pairs for ``item.user_properties``: the counts, the time spent,
+        and the first `max_sites` failing sites as ``file:line`` with their failure count.
+        """
+        props = [
+            ("assume_passed", self.passed),
+            ("assume_failed", self.failed),
+            ("assume_time", round(self.elapsed, 6)),
+        ]
+        if self.sampled_out:
+            props.append(("assume_sampled_out", self.sampled_out))
+        failed_sites = [(site, failed) for site, (_, failed) in self.sites.items() if failed]
+        for (filename, line), failed in failed_sites[:max_sites]:
+            props.append(("assume_failed_site", "%s:%s x%s" % (filename, line, failed)))
+        return props
@@ -0,0 +1,140 @@
+"""
+Propagation of the assumptions made in ``multiprocessing`` workers back to the test (``pytest.assume_workers``).
+
+Each worker process gets its own copy of the collected assumptions. Wrapped functions send
+theirs, in one batch per call, through a pipe to the test process, where a thread reads them;
+they're merged into the test's assumptions, labelled with the worker they came from, once the
+``with`` block ends.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+
+import pytest
+
+# Queue to the test process, and the pid of the worker it was set up in.
+_CHANNEL = None
+_WORKER_PID = None
+
+
+def _init_worker(queue, capture_locals):
+    """Pool initializer: set up the channel (and, in spawned workers, the pytest namespace)."""
+    global _CHANNEL, _WORKER_PID
+    from . import plugin
+
+    _CHANNEL = queue
+    _WORKER_PID = os.getpid()
+    if not hasattr(pytest, "_assume_fail_hooked"):
+        # pytest isn't configured here: no hooks, and the failures' tracebacks aren't sent anyway.
+        plugin._install_api()
+        pytest._assume_capture_locals = capture_locals
+        pytest._assume_pass_hooked = pytest._assume_fail_hooked = False
+        pytest._assume_keep_tracebacks = False
+    # Forked workers inherit whatever the test collected so far.
+    plugin._FAILED_ASSUMPTIONS.clear()
+
+
+def _send():
+    from . import plugin
+
+    if _CHANNEL is None or os.getpid() != _WORKER_PID:
+        # Not in a worker set up by the initializer (e.g. called from the test process itself,
+        # or from a thread pool): the assumptions are already where they belong.
+        return
+
+    store = plugin._FAILED_ASSUMPTIONS
+    if store or store.passed or store.sampled_out:
+        process = multiprocessing.current_process()
+        _CHANNEL.put(("worker %s (pid %s)" % (process.name, process.pid), store.export()))
+    store.clear()
+
+
+class _Reporting(object):
+    """Picklable wrapper, sending the assumptions made during each call of `func`."""
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, *args, **kwargs):
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            _send()
+
+
+def _run_process(queue, capture_locals, target, args, kwargs):
+    _init_worker(queue, capture_locals)
+    _Reporting(target)(*args, **kwargs)
+
+
+class AssumeWorkers(object):
+    """
+    Collects the assumptions made in worker processes started within the ``with`` block::
+
+        with pytest.assume_workers() as workers:
+            with multiprocessing.Pool(4, initializer=workers.initializer, initargs=workers.initargs) as pool:
+                pool.map(workers.wrap(check_shard), shards)
+
+            process = workers.Process(target=check_shard, args=(shard,))
+            process.start()
+            process.join()
+
+    Needs Python 3.4+ (multiprocessing contexts and ``SimpleQueue``).
+
+    :param context: multiprocessing context the workers are started from (the default one if None).
+    """
+
+    initializer = staticmethod(_init_worker)
+
+    def __init__(self, context=None):
+        if sys.version_info < (3, 4):
+            raise RuntimeError("pytest.assume_workers needs Python 3.4 or later")
+        self._context = context or multiprocessing
+        self._batches = []
+        self._queue = None
+        self._reader = None
+
+    @property
+    def initargs(self):
+        return (self._queue, getattr(pytest, "_assume_capture_locals", False))
+
+    def wrap(self, func):
+        """Wrap `func`, run in a worker set up by :attr:`initializer`, to send its assumptions back."""
+        return _Reporting(func)
+
+    def Process(self, target, args=(), kwargs=None, **options):
+        """A ``multiprocessing.Process`` running `target`, sending its assumptions back."""
+        return self._context.Process(
+            target=_run_process, args=self.initargs + (target, args, kwargs or {}), **options
+        )
+
+    def _read(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            self._batches.append(batch)
+
+    def __enter__(self):
+        self._queue = self._context.SimpleQueue()
+        self._reader = threading.Thread(target=self._read, name="pytest-assume-workers")
+        self._reader.daemon = True
+        self._reader.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        from . import plugin
+
+        # Everything the workers sent is ahead of this in the pipe.
+        self._queue.put(None)
+        self._reader.join()
+        sites = getattr(pytest, "_assume_sites", None)
+        for scope, exported in self._batches:
+            plugin._FAILED_ASSUMPTIONS.merge(exported, scope)
+            if sites is not None:
+                # The sites checked in the workers count as executed (--assume-coverage).
+                failures, passes, _ = exported
+                for record in failures + passes:
+                    sites.hit(os.path.abspath(record[0]), record[1])
+        self._batches = []
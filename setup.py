@@ -27,5 +27,8 @@ setup(
         "Programming Language :: Python",
     ],
     # the following makes a plugin available to py.test
-    entry_points={"pytest11": ["assume = pytest_assume.plugin"]},
+    entry_points={
+        "pytest11": ["assume = pytest_assume.plugin"],
+        "console_scripts": ["pytest-assume-history = pytest_assume.history:main"],
+    },
 )
@@ -1,3 +1,5 @@
+import sys
+
 import pytest
 
 pytest_plugins = ("pytester",)
@@ -614,3 +616,765 @@ def test_report_sections(testdir):
     result = testdir.runpytest_inprocess()
     result.assert_outcomes(failed=1)
     assert "Captured log call" in "\n".join(result.outlines)
+
+
+def test_store_interns_repeated_failures():
+    from pytest_assume.store import AssumptionStore
+
+    store = AssumptionStore()
+    for i in range(100):
+        store.add_failure("test_a.py", 3, "assert x\n", "AssertionError: assert False", ["\tx          = 0"])
+    store.add_pass("test_a.py", 4)
+
+    assert len(store) == 100
+    assert len(store._messages) == 3
+    assert list(store.sites()) == [("test_a.py", 3, 0, 100), ("test_a.py", 4, 1, 0)]
+    assert store[-1].repr() == "test_a.py:3: AssumptionFailure\n>>\tassert x\nAssertionError: assert False\n\n"
+    assert store[0].longrepr().endswith("Locals:\n\tx          = 0")
+
+    store.clear()
+    assert not store
+    assert list(store.sites()) == []
+
+
+def test_summary_report_hook_gets_views(testdir):
+    testdir.makeconftest(
+        """
+        def pytest_assume_summary_report(failed_assumptions):
+            return "\\n".join(
+                "SITE %s:%s" % (x.filename, x.lineno) for x in failed_assumptions[-2:]
+            )
+        """
+    )
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def test_loop():
+            for i in range(5):
+                pytest.assume(i < 2)
+        """
+    )
+    result = testdir.runpytest_inprocess()
+    result.assert_outcomes(0, 0, 1)
+    assert "3 Failed Assumptions" in result.stdout.str()
+    assert "SITE test_summary_report_hook_gets_views.py:5" in result.stdout.str()
+
+
+@pytest.mark.parametrize("keep_tracebacks", [False, True])
+def test_summary_report_hook_gets_locals_and_tracebacks(testdir, keep_tracebacks):
+    testdir.makeconftest(
+        """
+        def pytest_assume_summary_report(failed_assumptions):
+            return "\\n".join(
+                "LOCALS %s TB %s" % (x.longrepr().split("Locals:")[1].split(), x.tb is not None)
+                for x in failed_assumptions
+            )
+        """
+    )
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def test_loop():
+            for i in range(2):
+                pytest.assume(i < 0)
+        """
+    )
+    args = ["--assume-keep-tracebacks"] if keep_tracebacks else []
+    result = testdir.runpytest_inprocess(*args)
+    result.assert_outcomes(0, 0, 1)
+    stdout = result.stdout.str()
+    assert "LOCALS ['i', '=', '0'] TB %s" % keep_tracebacks in stdout
+    assert "LOCALS ['i', '=', '1'] TB True" in stdout
+
+
+def test_assume_in_fixture_setup_and_teardown(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        @pytest.fixture
+        def checked():
+            pytest.assume(1 == 2, "bad setup")
+            yield
+            pytest.assume(2 == 3, "bad teardown")
+
+        def test_func(checked):
+            pass
+        """
+    )
+    result = testdir.runpytest_inprocess()
+    outcomes = result.parseoutcomes()
+    # "error" before pytest 6, "errors" since.
+    assert outcomes.get("errors", outcomes.get("error")) == 2
+    stdout = result.stdout.str()
+    assert "ERROR at setup of test_func" in stdout
+    assert "ERROR at teardown of test_func" in stdout
+    assert "1 Failed Assumptions in setup" in stdout
+    assert "1 Failed Assumptions in teardown" in stdout
+    assert "AssumptionFailure (in function-scoped fixture 'checked')" in stdout
+
+
+def test_assume_in_session_fixture_reported_once(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        @pytest.fixture(scope="session")
+        def dataset():
+            rows = [1, 2, -3]
+            for row in rows:
+                pytest.assume(row > 0, "negative row %s" % row)
+            return rows
+
+        def test_one(dataset):
+            pytest.assume(len(dataset) == 3)
+
+        def test_two(dataset):
+            pytest.assume(len(dataset) == 3)
+        """
+    )
+    result = testdir.runpytest_inprocess()
+    outcomes = result.parseoutcomes()
+    assert outcomes.get("passed") == 1
+    assert outcomes.get("errors", outcomes.get("error")) == 1
+    stdout = result.stdout.str()
+    assert "ERROR at setup of test_one" in stdout
+    assert "ERROR at setup of test_two" not in stdout
+    assert "AssumptionFailure (in session-scoped fixture 'dataset')" in stdout
+    # Only counted in the error reports: newer pluggy versions also repeat them in a warning.
+    reported = [line for line in result.outlines if line.startswith("E ") and "negative row -3" in line]
+    assert len(reported) == 1
+    assert "negative row 1" not in stdout
+
+
+LIVE_TEST = """
+    import pytest
+
+    def test_func():
+        for i in range(3):
+            pytest.assume(i == 0, "i is %s" % i)
+    """
+
+
+def test_live_stream_to_file(testdir):
+    testdir.makepyfile(LIVE_TEST)
+    live = testdir.tmpdir.join("live.log")
+    result = testdir.runpytest_inprocess("--assume-live", str(live))
+    result.assert_outcomes(0, 0, 1)
+    lines = live.read().splitlines()
+    assert len(lines) == 2
+    assert lines[0].startswith("ASSUMPTION FAILED test_live_stream_to_file.py::test_func test_live_stream_to_file.py:5:")
+    assert lines[0].endswith("(AssertionError: i is 1)")
+
+
+def test_live_stream_to_terminal(testdir):
+    testdir.makepyfile(LIVE_TEST)
+    result = testdir.runpytest_inprocess("--assume-live", "-")
+    result.assert_outcomes(0, 0, 1)
+    assert "(AssertionError: i is 2)" in result.stdout.str()
+
+
+@pytest.mark.skipif(not hasattr(__import__("socket"), "AF_UNIX"), reason="needs Unix sockets")
+def test_live_stream_to_unix_socket(testdir):
+    import socket
+
+    path = str(testdir.tmpdir.join("live.sock"))
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    testdir.makepyfile(LIVE_TEST)
+    try:
+        result = testdir.runpytest_inprocess("--assume-live", "unix:" + path)
+        conn, _ = server.accept()
+        data = conn.makefile("rb").read().decode("utf-8")
+        conn.close()
+    finally:
+        server.close()
+    result.assert_outcomes(0, 0, 1)
+    assert data.count("ASSUMPTION FAILED") == 2
+
+
+@pytest.mark.parametrize("nested", [False, True])
+def test_abort_rate(testdir, nested):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def check():
+            for i in range(1000):
+                pytest.assume(i % 2 == 0)
+            print("finished the loop")
+
+        def test_func():
+            if {nested}:
+                # The abort isn't recorded as a failure of the enclosing block.
+                with pytest.assume:
+                    check()
+            else:
+                check()
+        """.format(
+            nested=nested
+        )
+    )
+    result = testdir.runpytest_inprocess("--assume-abort-rate", "0.4", "--assume-abort-after", "10")
+    result.assert_outcomes(0, 0, 1)
+    stdout = result.stdout.str()
+    assert "AssumptionAbort" in stdout
+    assert "Aborting: 5 of 10 assumptions failed" in stdout
+    assert "5 Failed Assumptions" in stdout
+    assert "finished the loop" not in stdout
+
+
+def test_assume_close(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def test_close():
+            assert pytest.assume_close([1.0, 2.0, 3.0], [1.0, 2.0000001, 3.0])
+            assert pytest.assume_close([[1, 2], [3, 4]], [[1, 2], [3, 4.1]], abs=0.2)
+
+        def test_not_close():
+            actual = [float(i) for i in range(100)]
+            expected = [float(i) + (i % 10 == 0) for i in range(100)]
+            ret = pytest.assume_close(actual, expected, max_report=3)
+            assert ret is False
+        """
+    )
+    result = testdir.runpytest_inprocess()
+    result.assert_outcomes(1, 0, 1)
+    stdout = result.stdout.str()
+    assert "1 Failed Assumptions" in stdout
+    assert "test_assume_close.py:10: AssumptionFailure" in stdout
+    assert "10 of 100 values differ" in stdout
+    assert "max abs error 1, max rel error 1" in stdout
+    assert "first mismatches: [0] 0.0 != 1.0, [10] 10.0 != 11.0, [20] 20.0 != 21.0" in stdout
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_compare_close(monkeypatch, use_numpy):
+    from pytest_assume import compare
+
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(compare, "numpy", None)
+
+    assert compare.compare_close([1.0, 2.0], [1.0, 2.0]) is None
+    assert compare.compare_close([1.0, 2.0], 1.5, abs=0.5) is None
+    assert compare.compare_close(1.0, 1.1, rel=0.2) is None
+    assert compare.compare_close([1.0, 2.0], [1.0, 2.0, 3.0]).startswith("shape mismatch")
+    # No broadcasting, besides a scalar expectation.
+    assert compare.compare_close([1.0], [1.0, 1.0, 1.0]).startswith("shape mismatch")
+    assert compare.compare_close([[1.0], [2.0]], [[1.0, 2.0]]).startswith("shape mismatch")
+    msg = compare.compare_close([[0.0, 1.0], [float("nan"), 3.0]], [[0.0, 2.0], [1.0, 3.0]])
+    assert msg.startswith("2 of 4 values differ (rel=1e-06, abs=1e-12): max abs error 1, max rel error 0.5;")
+    assert msg.endswith("first mismatches: [0, 1] 1.0 != 2.0, [1, 0] nan != 1.0")
+
+
+def test_assume_matches_file(testdir):
+    testdir.tmpdir.join("golden.txt").write_binary(b"one\ntwo\nthree\n")
+    testdir.tmpdir.join("same.txt").write_binary(b"one\ntwo\nthree\n")
+    testdir.tmpdir.join("other.txt").write_binary(b"one\ntwo\nthRee\n")
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def test_same():
+            assert pytest.assume_matches_file("same.txt", "golden.txt", chunk_size=4)
+            assert pytest.assume_matches_file(b"one\\ntwo\\nthree\\n", "golden.txt")
+
+        def test_differs():
+            pytest.assume_matches_file("other.txt", "golden.txt", chunk_size=4)
+
+        def test_shorter():
+            pytest.assume_matches_file(b"one\\ntw", "golden.txt")
+
+        def test_missing():
+            pytest.assume_matches_file(b"", "missing/golden.txt")
+
+        def test_missing_actual():
+            pytest.assume_matches_file("missing.txt", "golden.txt")
+        """
+    )
+    result = testdir.runpytest_inprocess()
+    result.assert_outcomes(1, 0, 4)
+    stdout = result.stdout.str()
+    assert (
+        "content differs from golden file golden.txt at byte 10 (line 3, column 3): "
+        "b'one\\ntwo\\nthRee\\n' != b'one\\ntwo\\nthree\\n'"
+    ) in stdout
+    assert "at byte 6 (line 2, column 3)" in stdout
+    assert "sizes differ: 6 != 14 bytes" in stdout
+    assert "golden file missing/golden.txt does not exist" in stdout
+    assert "AssertionError: file missing.txt does not exist" in stdout
+
+    result = testdir.runpytest_inprocess("--assume-update-goldens")
+    result.assert_outcomes(4, 0, 1)
+    assert testdir.tmpdir.join("golden.txt").read_binary() == b"one\ntw"
+    assert testdir.tmpdir.join("missing", "golden.txt").read_binary() == b""
+
+
+def test_junitxml_properties(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def test_func():
+            for i in range(10):
+                pytest.assume(i < 7)
+            pytest.assume(False)
+
+        def test_no_assumptions():
+            pass
+        """
+    )
+    xml = testdir.tmpdir.join("junit.xml")
+    result = testdir.runpytest_inprocess("--junitxml", str(xml), "--assume-report-sites", "1")
+    result.assert_outcomes(1, 0, 1)
+
+    from xml.etree import ElementTree
+
+    cases = {case.get("name"): case for case in ElementTree.parse(str(xml)).iter("testcase")}
+    props = [(p.get("name"), p.get("value")) for p in cases["test_func"].iter("property")]
+    names = [name for name, _ in props]
+    assert ("assume_passed", "7") in props
+    assert ("assume_failed", "4") in props
+    assert "assume_time" in names
+    assert props[-1] == ("assume_failed_site", "test_junitxml_properties.py:5 x3")
+    assert names.count("assume_failed_site") == 1
+    assert list(cases["test_no_assumptions"].iter("property")) == []
+
+
+def test_history(testdir):
+    from pytest_assume import history
+
+    testdir.makepyfile(
+        """
+        import os
+        import pytest
+
+        def test_func():
+            pytest.assume(os.environ.get("FLAKY") != "1")
+            pytest.assume(False)
+            pytest.assume(True)
+        """
+    )
+    db = str(testdir.tmpdir.join("history.db"))
+    for flaky in ("0", "1", "1"):
+        testdir.monkeypatch.setenv("FLAKY", flaky)
+        testdir.runpytest_inprocess("--assume-history", db).assert_outcomes(0, 0, 1)
+
+    conn = history.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM runs").fetchone() == (3,)
+    assert conn.execute("SELECT COUNT(*) FROM outcomes").fetchone() == (9,)
+    assert history.top_sites(conn) == [("test_history.py", 5, 3, 2, 2)]
+    assert history.top_sites(conn, runs=2) == []
+    assert history.top_sites(conn, flaky=False) == [
+        ("test_history.py", 6, 3, 3, 3),
+        ("test_history.py", 5, 3, 2, 2),
+    ]
+    conn.close()
+
+    assert history.main([db, "--failing", "--limit", "1"]) == 0
+
+
+def test_assume_eventually(testdir):
+    testdir.makepyfile(
+        """
+        import itertools
+        import pytest
+
+        def test_eventually():
+            counter = itertools.count()
+            assert pytest.assume_eventually(lambda: next(counter) >= 3, interval=0.001)
+            assert next(counter) == 4
+
+        def test_never():
+            def consumers():
+                return []
+            assert not pytest.assume_eventually(consumers, timeout=0.05, interval=0.01, msg="consumer registered")
+
+        def test_never_asserting():
+            def drained():
+                assert 1 == 2, "still one item"
+            pytest.assume_eventually(drained, timeout=0.01, interval=0.01)
+        """
+    )
+    result = testdir.runpytest_inprocess()
+    result.assert_outcomes(1, 0, 2)
+    stdout = result.stdout.str()
+    assert "test_assume_eventually.py:12: AssumptionFailure" in stdout
+    assert "consumer registered: consumers still false after" in stdout
+    assert "attempts in 0.05s; last value: []" in stdout
+    assert "last attempt raised AssertionError: still one item" in stdout
+
+
+@pytest.mark.skipif(sys.version_info < (3, 5), reason="needs async/await")
+def test_assume_eventually_async(testdir):
+    testdir.makepyfile(
+        """
+        import asyncio
+        import pytest
+
+        def test_async():
+            state = {"calls": 0}
+
+            async def ready():
+                state["calls"] += 1
+                return state["calls"] > 2
+
+            async def main():
+                ok = await pytest.assume_eventually_async(ready, interval=0.001)
+                never = await pytest.assume_eventually_async(lambda: 0, timeout=0.01, interval=0.005)
+                return ok, never
+
+            # Not asyncio.run(), which needs Python 3.7.
+            loop = asyncio.new_event_loop()
+            try:
+                assert loop.run_until_complete(main()) == (True, False)
+            finally:
+                loop.close()
+        """
+    )
+    result = testdir.runpytest_inprocess()
+    result.assert_outcomes(0, 0, 1)
+    stdout = result.stdout.str()
+    assert "1 Failed Assumptions" in stdout
+    assert "test_assume_eventually_async.py:13: AssumptionFailure" in stdout
+    assert "<lambda> still false after" in stdout
+
+
+SAMPLED_TEST = """
+    import pytest
+
+    def test_func():
+        for i in range(1000):
+            pytest.assume(i < 0)
+        for i in range(1000):
+            with pytest.assume:
+                assert i < 0
+    """
+
+
+def test_sample_rate(testdir):
+    testdir.makepyfile(SAMPLED_TEST)
+    result = testdir.runpytest_inprocess("--assume-sample-rate", "0.1")
+    result.assert_outcomes(0, 0, 1)
+    stdout = result.stdout.str()
+    failed = int(stdout.split(" Failed Assumptions (")[0].split()[-1])
+    sampled_out = int(stdout.split(" Failed Assumptions (")[1].split()[0])
+    assert 100 < failed < 300
+    assert failed + sampled_out == 2000
+    assert "pytest-assume: %s assumption checks sampled out" % sampled_out in stdout
+
+    # Same node id and seed, same sample.
+    again = testdir.runpytest_inprocess("--assume-sample-rate", "0.1")
+    assert "%s Failed Assumptions (%s sampled out)" % (failed, sampled_out) in again.stdout.str()
+    other = testdir.runpytest_inprocess("--assume-sample-rate", "0.1", "--assume-sample-seed", "1")
+    assert "%s Failed Assumptions (%s sampled out)" % (failed, sampled_out) not in other.stdout.str()
+
+
+def test_sample_per_call(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def test_func():
+            assert pytest.assume(False, sample=0) is None
+            with pytest.assume(sample=0):
+                assert False
+            pytest.assume(False, "always checked", sample=1)
+        """
+    )
+    result = testdir.runpytest_inprocess("--assume-sample-rate", "0")
+    result.assert_outcomes(0, 0, 1)
+    stdout = result.stdout.str()
+    assert "1 Failed Assumptions (2 sampled out)" in stdout
+    assert "always checked" in stdout
+
+
+def test_sample_nested(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def test_outer_sampled_out():
+            with pytest.assume(sample=0):
+                pytest.assume(True)
+                assert False, "outer block"
+
+        def test_inner_sampled_out():
+            with pytest.assume(sample=1):
+                pytest.assume(False, "inner call", sample=0)
+                assert False, "outer block"
+        """
+    )
+    result = testdir.runpytest_inprocess()
+    result.assert_outcomes(1, 0, 1)
+    stdout = result.stdout.str()
+    assert "1 Failed Assumptions (1 sampled out)" in stdout
+    assert "AssertionError: outer block" in stdout
+    assert "AssertionError: inner call" not in stdout
+    assert "pytest-assume: 2 assumption checks sampled out" in stdout
+
+
+@pytest.mark.skipif(sys.version_info < (3, 4), reason="needs multiprocessing contexts")
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_assume_workers(testdir, start_method):
+    import multiprocessing
+
+    if start_method not in multiprocessing.get_all_start_methods():
+        pytest.skip("%s start method not available" % start_method)
+    testdir.makepyfile(
+        """
+        import multiprocessing
+        import pytest
+
+        def check_shard(shard):
+            for value in shard:
+                pytest.assume(value % 7 != 0, "multiple of 7: %s" % value)
+            # The whole API is available in the workers.
+            pytest.assume_close(sum(shard), 0, abs=1e9)
+            return len(shard)
+
+        def test_pool():
+            context = multiprocessing.get_context("{start_method}")
+            shards = [range(i, i + 10) for i in range(0, 40, 10)]
+            pytest.assume(False, "in the test itself")
+            with pytest.assume_workers(context) as workers:
+                pool = context.Pool(2, initializer=workers.initializer, initargs=workers.initargs)
+                try:
+                    assert pool.map(workers.wrap(check_shard), shards) == [10] * 4
+                finally:
+                    pool.close()
+                    pool.join()
+
+                process = workers.Process(target=check_shard, args=([49],))
+                process.start()
+                process.join()
+        """.format(
+            start_method=start_method
+        )
+    )
+    # multiprocessing doesn't cope with the module snapshots of in-process runs.
+    result = testdir.runpytest_subprocess("--junitxml", "junit.xml")
+    result.assert_outcomes(0, 0, 1)
+    stdout = result.stdout.str()
+    assert "8 Failed Assumptions" in stdout
+    assert "in the test itself" in stdout
+    for value in (0, 7, 14, 21, 28, 35, 49):
+        assert "multiple of 7: %s" % value in stdout
+    assert "AssumptionFailure (in worker " in stdout
+    assert 'name="assume_passed" value="39"' in testdir.tmpdir.join("junit.xml").read()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 4), reason="needs multiprocessing contexts")
+def test_assume_workers_in_process(testdir):
+    testdir.makepyfile(
+        """
+        from multiprocessing.pool import ThreadPool
+        import pytest
+
+        def check(value):
+            pytest.assume(value != 1, "bad value %s" % value)
+
+        def test_func():
+            pytest.assume(False, "in the test")
+            with pytest.assume_workers() as workers:
+                # Serial fallback, and threads: the test's own assumptions are kept.
+                list(map(workers.wrap(check), [0, 1, 2]))
+                pool = ThreadPool(2)
+                try:
+                    pool.map(workers.wrap(check), [1, 3])
+                finally:
+                    pool.close()
+                    pool.join()
+        """
+    )
+    result = testdir.runpytest_inprocess()
+    result.assert_outcomes(0, 0, 1)
+    stdout = result.stdout.str()
+    assert "3 Failed Assumptions" in stdout
+    assert "AssertionError: in the test" in stdout
+    assert "AssertionError: bad value 1" in stdout
+
+
+def test_scan_sites():
+    from pytest_assume.sites import scan
+
+    source = "\n".join(
+        [
+            "import pytest",
+            "from pytest import assume",
+            "def test_func(x):",
+            "    pytest.assume(x)",
+            "    with pytest.assume:",
+            "        assert x",
+            "    with assume(sample=0.5):",
+            "        pytest.assume_close(",
+            "            x, 1)",
+            "    other.assume(x)",
+            "    assume(x)",
+            "    check(x)",
+        ]
+    )
+    assert scan(source + "\nfrom pytest_assume.plugin import assume_close as check") == [
+        [4, 4],
+        [5, 6],
+        [7, 9],
+        [8, 9],
+        [11, 11],
+        [12, 12],
+    ]
+    # Hypothesis' assume isn't an assumption site.
+    source = source.replace("from pytest import assume", "from hypothesis import assume")
+    assert scan(source) == [[4, 4], [5, 6], [8, 9]]
+
+
+def test_assume_coverage(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def test_func():
+            for i in range(3):
+                pytest.assume(True)
+            if False:
+                pytest.assume(False, "never")
+            with pytest.assume:
+                assert True
+            with pytest.assume:
+                if False:
+                    pytest.assume_close(1, 2)
+            # Sampled out, but executed.
+            pytest.assume(True, sample=0)
+        """
+    )
+    result = testdir.runpytest_inprocess("--assume-coverage")
+    result.assert_outcomes(1, 0, 0)
+    stdout = result.stdout.str()
+    assert "4 of 6 assumption sites executed" in stdout
+    assert "test_assume_coverage.py:14: never executed" not in stdout
+    assert 'test_assume_coverage.py:7: never executed: pytest.assume(False, "never")' in stdout
+    assert "test_assume_coverage.py:12: never executed: pytest.assume_close(1, 2)" in stdout
+
+    cached = testdir.runpytest_inprocess("--assume-coverage")
+    assert "4 of 6 assumption sites executed" in cached.stdout.str()
+    assert testdir.tmpdir.join(".pytest_cache", "v", "pytest-assume", "sites").check()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 4), reason="needs multiprocessing contexts")
+def test_assume_coverage_workers(testdir):
+    testdir.makepyfile(
+        """
+        import multiprocessing
+        import pytest
+
+        def check(value):
+            pytest.assume(value >= 0)
+
+        def test_func():
+            context = multiprocessing.get_context("spawn")
+            with pytest.assume_workers(context) as workers:
+                pool = context.Pool(1, initializer=workers.initializer, initargs=workers.initargs)
+                try:
+                    pool.map(workers.wrap(check), [0, 1])
+                finally:
+                    pool.close()
+                    pool.join()
+        """
+    )
+    # multiprocessing doesn't cope with the module snapshots of in-process runs.
+    result = testdir.runpytest_subprocess("--assume-coverage")
+    result.assert_outcomes(1, 0, 0)
+    assert "1 of 1 assumption sites executed" in result.stdout.str()
+
+
+def test_hypothesis_examples(testdir):
+    pytest.importorskip("hypothesis")
+    testdir.makepyfile(
+        """
+        import pytest
+        from hypothesis import given, settings, strategies as st
+
+        @settings(max_examples=200, database=None, derandomize=True)
+        @given(st.integers(min_value=0, max_value=10000))
+        def test_func(x):
+            pytest.assume(x < 100, "too large")
+            pytest.assume(x % 2 == 0 or x < 100, "odd and too large")
+        """
+    )
+    result = testdir.runpytest_inprocess("--junitxml", "junit.xml")
+    result.assert_outcomes(0, 0, 1)
+    stdout = result.stdout.str()
+    # Only the shrunk example is reported.
+    assert "1 Failed Assumptions" in stdout
+    assert "test_func(\n    x=100,\n)" in stdout or "x=100" in stdout
+    assert "odd and too large" not in stdout
+    junit = testdir.tmpdir.join("junit.xml").read()
+    failed = int(junit.split('name="assume_failed" value="')[1].split('"')[0])
+    assert failed > 1
+
+
+def test_hypothesis_examples_sampled(testdir):
+    pytest.importorskip("hypothesis")
+    testdir.makepyfile(
+        """
+        import pytest
+        from hypothesis import given, settings, strategies as st
+
+        @pytest.mark.parametrize("p", [0, 1])
+        @settings(max_examples=200, database=None, derandomize=True)
+        @given(st.integers(min_value=0, max_value=1000))
+        def test_func(p, x):
+            pytest.assume(x < 100, "too large")
+        """
+    )
+    result = testdir.runpytest_inprocess("--assume-sample-rate", "0.5")
+    result.assert_outcomes(0, 0, 2)
+    stdout = result.stdout.str()
+    # Replaying an example checks the same assumptions.
+    assert "Flaky" not in stdout
+    assert stdout.count("AssertionError: too large") == 2
+    # Some examples are checked, others not.
+    sampled_out = int(stdout.split("pytest-assume: ")[1].split()[0])
+    assert sampled_out > 0
+
+
+def test_sampler_examples():
+    from pytest_assume.sampling import Sampler
+
+    def decisions(sampler, nodeid, example):
+        sampler.reset(nodeid, example)
+        return [sampler.keep() for _ in range(20)]
+
+    sampler = Sampler(0.5)
+    first = decisions(sampler, "test_a.py::test_func", "(1,)")
+    assert decisions(sampler, "test_a.py::test_func", "(1,)") == first
+    assert decisions(sampler, "test_a.py::test_func", "(2,)") != first
+    assert decisions(sampler, "test_a.py::test_func[1]", "(1,)") != first
+
+
+def test_hypothesis_examples_hard_failure(testdir):
+    pytest.importorskip("hypothesis")
+    testdir.makepyfile(
+        """
+        import pytest
+        from hypothesis import given, settings, strategies as st
+
+        @settings(max_examples=10, database=None, derandomize=True)
+        @given(st.integers())
+        def test_func(x):
+            pytest.assume(False, "soft")
+            raise ValueError("hard")
+        """
+    )
+    result = testdir.runpytest_inprocess()
+    result.assert_outcomes(0, 0, 1)
+    stdout = result.stdout.str()
+    assert "ValueError: hard" in stdout
+    # The soft failures of the examples don't leak into the report of the test.
+    assert "Failed Assumptions" not in stdout